@@ -1,5 +1,17 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import Response
+from anyio import CapacityLimiter, to_thread
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional, Tuple
+import hashlib
+import orjson
+import os
+import threading
+
+from models import SimulationInput, ScenarioBatchInput
+from simulation import run_simulation, run_scenario_batch
 
 app = FastAPI()
 
@@ -16,39 +28,95 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-from models import SimulationInput
-from simulation import run_simulation
-from pydantic import BaseModel
-from typing import List, Dict
+DATA_FILE = "user_data.json"
+SIM_CACHE_SIZE = 128
 
-import json
-import os
+# Simulations are CPU-bound; bound how many run at once so they cannot
+# starve the threadpool that also serves /save and /load.
+simulation_limiter = CapacityLimiter(os.cpu_count() or 1)
+# A scenario batch already spreads across every core, and the workqueue
+# threading layer it runs on must not be entered from two threads at once.
+batch_limiter = CapacityLimiter(1)
 
-DATA_FILE = "user_data.json"
+# Recent serialized simulation results (LRU), keyed by a hash of the request
+# payload. Only touched from the event loop, so no locking is needed.
+_sim_cache: OrderedDict[bytes, bytes] = OrderedDict()
+
+# Parsed contents of DATA_FILE, tagged with the file's mtime so /load only
+# re-reads it after it has changed
+_load_cache: Optional[Tuple[int, dict]] = None
+
+def _simulation_key(input_data: SimulationInput) -> bytes:
+    h = hashlib.blake2b(orjson.dumps(input_data.model_dump()), digest_size=16)
+    # Results are anchored to the current year, so it is part of the key
+    h.update(str(datetime.now().year).encode())
+    return h.digest()
+
+def _run_simulation_json(input_data: SimulationInput) -> bytes:
+    return orjson.dumps(run_simulation(input_data), option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _run_scenario_batch_json(batch_input: ScenarioBatchInput) -> bytes:
+    return orjson.dumps(run_scenario_batch(batch_input), option=orjson.OPT_SERIALIZE_NUMPY)
+
+def _write_data(data: dict):
+    # Write the whole document to a per-writer temp file, then atomically swap
+    # it in so a crash or a concurrent save never leaves DATA_FILE truncated
+    tmp_file = f"{DATA_FILE}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+    os.replace(tmp_file, DATA_FILE)
+
+def _read_data():
+    with open(DATA_FILE, "rb") as f:
+        return orjson.loads(f.read())
 
 @app.post("/save")
-def save_data(input_data: SimulationInput):
+async def save_data(input_data: SimulationInput):
     """Save simulation data to a local JSON file"""
     try:
-        with open(DATA_FILE, "w") as f:
-            json.dump(input_data.model_dump(), f, indent=2)
+        await to_thread.run_sync(_write_data, input_data.model_dump())
         return {"status": "success", "message": "Data saved successfully"}
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.get("/load")
-def load_data():
+async def load_data():
     """Load simulation data from local JSON file"""
-    if not os.path.exists(DATA_FILE):
+    global _load_cache
+    try:
+        mtime = os.stat(DATA_FILE).st_mtime_ns
+    except FileNotFoundError:
         return {"status": "error", "message": "No saved data found"}
     
+    if _load_cache is not None and _load_cache[0] == mtime:
+        return _load_cache[1]
+    
     try:
-        with open(DATA_FILE, "r") as f:
-            data = json.load(f)
+        data = await to_thread.run_sync(_read_data)
+        _load_cache = (mtime, data)
         return data
     except Exception as e:
         return {"status": "error", "message": str(e)}
 
 @app.post("/simulate")
-def simulate(input_data: SimulationInput):
-    return run_simulation(input_data)
+async def simulate(input_data: SimulationInput):
+    key = _simulation_key(input_data)
+    body = _sim_cache.get(key)
+    if body is not None:
+        _sim_cache.move_to_end(key)
+    else:
+        body = await to_thread.run_sync(_run_simulation_json, input_data, limiter=simulation_limiter)
+        _sim_cache[key] = body
+        if len(_sim_cache) > SIM_CACHE_SIZE:
+            _sim_cache.popitem(last=False)
+    return Response(content=body, media_type="application/json")
+
+@app.post("/simulate_batch")
+async def simulate_batch(batch_input: ScenarioBatchInput):
+    body = await to_thread.run_sync(_run_scenario_batch_json, batch_input, limiter=batch_limiter)
+    return Response(content=body, media_type="application/json")
@@ -1,8 +1,24 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
 from typing import List, Optional, Literal
 from datetime import date
 
+# Inputs are immutable once validated, and unknown fields are rejected up front
+# instead of being carried through the simulation
+STRICT_MODEL_CONFIG = ConfigDict(extra="forbid", frozen=True)
+
+# Plausible ranges for ages and calendar years; the simulation kernel works in
+# int64, so anything outside these is rejected rather than overflowing there
+MAX_AGE = 150
+MIN_YEAR = 1800
+MAX_YEAR = 3000
+
+# Upper bound on scenario x year x asset values a scenario batch may produce
+# (8 bytes each, plus a sorted copy for the percentiles)
+MAX_SCENARIO_CELLS = 10_000_000
+
 class Asset(BaseModel):
+    model_config = STRICT_MODEL_CONFIG
+
     id: str
     name: str
     type: Literal["401k", "IRA", "RothIRA", "Brokerage", "Crypto", "RealEstate", "Cash", "Other"]
@@ -12,23 +28,27 @@ class Asset(BaseModel):
     contribution_currency: Literal["USD", "JPY"] = "USD"
     expected_return_rate: float = 0.05  # Annual return rate (0.05 = 5%)
     is_taxable: bool = True
-    withdrawal_start_age: Optional[int] = None
+    withdrawal_start_age: Optional[int] = Field(None, ge=0, le=MAX_AGE)
     withdrawal_rate: float = 0.0  # Annual withdrawal rate (0.04 = 4%)
 
 class Pension(BaseModel):
+    model_config = STRICT_MODEL_CONFIG
+
     id: str
     name: str
     type: Literal["SocialSecurity", "JPPension", "PrivateAnnuity", "Other"]
-    start_age: int
+    start_age: int = Field(ge=0, le=MAX_AGE)
     monthly_amount_estimated: float
     currency: Literal["USD", "JPY"] = "USD"
     is_inflation_adjusted: bool = True
 
 class LifeEvent(BaseModel):
+    model_config = STRICT_MODEL_CONFIG
+
     id: str
     name: str
     type: Literal["Retirement", "Relocation", "EducationEnd", "Other"]
-    year: int
+    year: int = Field(ge=MIN_YEAR, le=MAX_YEAR)
     month: int = 1
     description: Optional[str] = None
     impact_one_time: float = 0.0  # Positive for income, negative for cost
@@ -36,17 +56,39 @@ class LifeEvent(BaseModel):
     is_inflation_adjusted: bool = False   # Change in monthly cashflow
 
 class UserProfile(BaseModel):
-    birth_year: int
-    spouse_birth_year: Optional[int] = None
+    model_config = STRICT_MODEL_CONFIG
+
+    birth_year: int = Field(ge=MIN_YEAR, le=MAX_YEAR)
+    spouse_birth_year: Optional[int] = Field(None, ge=MIN_YEAR, le=MAX_YEAR)
     current_location: Literal["US", "JP"] = "US"
-    retirement_age: int = 65
-    life_expectancy: int = 95
+    retirement_age: int = Field(65, ge=0, le=MAX_AGE)
+    life_expectancy: int = Field(95, ge=0, le=MAX_AGE)
 
 class SimulationInput(BaseModel):
+    model_config = STRICT_MODEL_CONFIG
+
     profile: UserProfile
     assets: List[Asset]
     pensions: List[Pension]
     life_events: List[LifeEvent]
-    exchange_rate_usd_jpy: float = 150.0
+    exchange_rate_usd_jpy: float = Field(150.0, gt=0)  # JPY per USD
     inflation_rate_us: float = 0.03
     inflation_rate_jp: float = 0.01
+
+class ScenarioBatchInput(BaseModel):
+    model_config = STRICT_MODEL_CONFIG
+
+    simulation: SimulationInput
+    n_scenarios: int = Field(1000, ge=1, le=10000)
+    return_volatility: float = Field(0.02, ge=0.0)  # Std. dev. of each asset's return across scenarios (0.02 = 2%)
+    seed: Optional[int] = None
+
+    @model_validator(mode="after")
+    def check_batch_size(self):
+        n_years = self.simulation.profile.life_expectancy + 1
+        cells = self.n_scenarios * max(1, n_years) * max(1, len(self.simulation.assets))
+        if cells > MAX_SCENARIO_CELLS:
+            raise ValueError(
+                f"n_scenarios x years x assets = {cells} exceeds the limit of {MAX_SCENARIO_CELLS}"
+            )
+        return self
@@ -0,0 +1,16 @@
+import os
+import sys
+
+import uvicorn
+
+if __name__ == "__main__":
+    # Serve with the C-accelerated stack (uvloop event loop, httptools parser)
+    # and one worker process per CPU. uvloop is not available on Windows.
+    uvicorn.run(
+        "main:app",
+        host="127.0.0.1",
+        port=8000,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=os.cpu_count() or 1,
+    )
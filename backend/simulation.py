@@ -1,5 +1,7 @@
-from typing import List
-from models import SimulationInput, Asset, Pension, LifeEvent
+from typing import NamedTuple
+import numpy as np
+from numba import config as numba_config, njit, prange
+from models import SimulationInput, ScenarioBatchInput, Asset, Pension, LifeEvent
 
 
 def calculate_asset_value(
@@ -105,318 +107,438 @@ def apply_life_event_impact(
     return (0.0, 0.0)
 
 
-from datetime import datetime
+# Parallel kernels use Numba's built-in workqueue layer: it is always available,
+# and the TBB layer can deadlock when launched from the server's worker
+# threads. Workqueue is not reentrant, so parallel kernels must not run from
+# two threads at once (see batch_limiter in main.py).
+numba_config.THREADING_LAYER = "workqueue"
+
+# Sentinel age for assets that are never drawn down
+NEVER_WITHDRAW_AGE = np.iinfo(np.int64).max
+
+# Rows of the inflation power table
+INFLATION_US = 0
+INFLATION_JP = 1
+
+# Percentile bands reported for scenario batches
+SCENARIO_PERCENTILES = (10, 25, 50, 75, 90)
+
+
+class KernelInputs(NamedTuple):
+    """Arrays and scalars passed to the jitted kernels, in argument order."""
+    asset_initial: np.ndarray
+    asset_returns: np.ndarray
+    asset_contribs: np.ndarray
+    asset_withdraw_start: np.ndarray
+    asset_withdraw_rate: np.ndarray
+    asset_fx: np.ndarray
+    pension_start_ages: np.ndarray
+    pension_income_table: np.ndarray
+    event_one_time_by_year: np.ndarray
+    event_monthly_fixed_by_year: np.ndarray
+    event_monthly_infl_by_year: np.ndarray
+    infl_pow_us: np.ndarray
+    birth_year: int
+    retirement_age: int
+    current_real_year: int
+    start_year: int
+    end_year: int
 
-def run_simulation(input_data: SimulationInput) -> List[dict]:
+
+def _power_table(rates: np.ndarray, n: int, first: int = 0) -> np.ndarray:
     """
-    Run the financial simulation based on input data.
+    Tabulate compound growth factors by cumulative product.
     
     Args:
-        input_data: SimulationInput containing profile, assets, pensions, and life events
+        rates: Annual rates, one per row of the table
+        n: Number of periods (columns)
+        first: Period of the first column
     
     Returns:
-        List of simulation results for each year
+        Array of shape (len(rates), n) where [i, k] = (1 + rates[i]) ** (first + k)
     """
-    results = []
-    profile = input_data.profile
-    
-    # Calculate simulation range
-    start_year = profile.birth_year
-    end_year = start_year + profile.life_expectancy
-    current_real_year = datetime.now().year
-    
-    # Initialize asset states with 0 (will be set to current_value at current_real_year)
-    # We use a dictionary to track the running value of each asset by ID
-    # But since we only output total assets, we can just track the list of asset values
-    # actually, we need to track each asset individually to apply its specific growth rate
+    factors = np.empty((len(rates), n))
+    factors[:, 0] = (1 + rates) ** first
+    factors[:, 1:] = 1 + rates[:, None]
+    return np.cumprod(factors, axis=1)
+
+
+@njit(
+    "Tuple((float64[:], float64[:, :], float64[:, :], float64[:, :]))("
+    "float64[:], float64[:], float64[:], int64[:], float64[:], float64[:], "
+    "int64[:], float64[:, :], "
+    "float64[:], float64[:], float64[:], float64[:], "
+    "int64, int64, int64, int64, int64)",
+    cache=True,
+    fastmath=True,
+    nogil=True,
+)
+def _simulate_core(
+    asset_initial,
+    asset_returns,
+    asset_contribs,
+    asset_withdraw_start,
+    asset_withdraw_rate,
+    asset_fx,
+    pension_start_ages,
+    pension_income_table,
+    event_one_time_by_year,
+    event_monthly_fixed_by_year,
+    event_monthly_infl_by_year,
+    infl_pow_us,
+    birth_year,
+    retirement_age,
+    current_real_year,
+    start_year,
+    end_year,
+):
+    """
+    Sequential year walk of the simulation on plain arrays (no dicts, no strings).
     
-    # However, for years < current_real_year, we don't have data.
-    # We will output 0 for total assets in the past.
-    # We will initialize the running values at year == current_real_year.
+    Args:
+        asset_*: Per-asset parameters in native currency; asset_fx converts to USD
+        pension_start_ages: Age at which each pension starts paying
+        pension_income_table: USD income per (walked year, pension), i.e.
+            indexed by year - max(start_year, current_real_year)
+        event_*_by_year: Life-event one-time impacts and newly active monthly
+            impacts (fixed / inflation-adjusted), bucketed by year - start_year
+        infl_pow_us: (1 + US inflation) ** years from now, per walked year
     
-    running_asset_values = {} # Map asset_id -> current value
+    Returns:
+        Tuple of (total_assets, asset_balances, asset_drawdowns, pension_incomes),
+        indexed by year - start_year, all in USD and unrounded
+    """
+    n_years = end_year - start_year + 1
+    n_assets = asset_initial.shape[0]
+    n_pensions = pension_start_ages.shape[0]
     
-    # Track recurring monthly impacts from life events
-    recurring_monthly_impact = 0.0
+    total_assets = np.zeros(n_years)
+    asset_balances = np.zeros((n_years, n_assets))
+    asset_drawdowns = np.zeros((n_years, n_assets))
+    pension_incomes = np.zeros((n_years, n_pensions))
     
-    for year in range(start_year, end_year + 1):
-        current_age = year - profile.birth_year
-        
-        # 1. Initialize or Update Asset Values
-        if year < current_real_year:
-            # Past: We don't know the history, so we report 0 for simplicity
-            # (Or we could try to back-calculate, but that's complex/inaccurate)
-            total_assets = 0.0
-        elif year == current_real_year:
-            # Present: Initialize with user inputs
-            total_assets = 0.0
-            for asset in input_data.assets:
-                running_asset_values[asset.id] = asset.current_value
-                total_assets += asset.current_value
-        else:
-            # Future: Apply growth and contributions to running values
-            total_assets = 0.0
-            for asset in input_data.assets:
-                if asset.id in running_asset_values:
-                    # Apply annual return
-                    running_asset_values[asset.id] *= (1 + asset.expected_return_rate)
-                    # Add annual contributions
-                    running_asset_values[asset.id] += asset.contribution_monthly * 12
-                    
-                    # Convert to USD for display if needed (assuming running value is in native currency)
-                    # Wait, the input current_value is just a number. The asset has a currency field.
-                    # We should track values in their native currency and convert only for the total sum.
-                    
-                    val_in_usd = running_asset_values[asset.id]
-                    if asset.currency == "JPY":
-                        val_in_usd /= input_data.exchange_rate_usd_jpy
-                    
-                    total_assets += val_in_usd
-            
-        # 2. Calculate Pension Income (only relevant if it adds to assets)
-        # In this simple model, we assume surplus income becomes assets (cash?)
-        # But we don't have a "Cash" asset bucket that automatically grows.
-        # We will add net income (pension + life events) to the total_assets directly.
-        # To do this properly in the loop, we should distribute it to some asset or just keep a "Cash" accumulator.
-        # For simplicity, let's add it to a generic "Accumulated Cash" bucket if year >= current_real_year.
-        
-        total_pension_income = 0.0
-        if year >= current_real_year:
-            for pension in input_data.pensions:
-                if current_age >= pension.start_age:
-                    monthly = pension.monthly_amount_estimated
-                    # Inflation
-                    years_since_start = max(0, year - current_real_year) # Simplified inflation from now
-                    # Actually inflation should start from now, not from pension start?
-                    # Usually inflation applies from today.
-                    
-                    if pension.currency == "USD":
-                        inflation = input_data.inflation_rate_us
-                    else:
-                        inflation = input_data.inflation_rate_jp
-                        
-                    if pension.is_inflation_adjusted:
-                        monthly *= (1 + inflation) ** years_since_start
-                    
-                    annual = monthly * 12
-                    if pension.currency == "JPY":
-                        annual /= input_data.exchange_rate_usd_jpy
-                    
-                    total_pension_income += annual
-
-        # 3. Life Events
-        one_time_impact = 0.0
-        # Update recurring impact
-        for event in input_data.life_events:
-            if event.year == year and event.month == 1: # Simplified to annual resolution
-                one_time_impact += event.impact_one_time
-                recurring_monthly_impact += event.impact_monthly
-            elif event.year == year:
-                 # If event starts mid-year, we should handle it, but for now let's just add it
-                 one_time_impact += event.impact_one_time
-                 recurring_monthly_impact += event.impact_monthly
-
-        # Apply Net Income to Assets (Future only)
-        if year > current_real_year:
-            # We need a place to store this "extra" money.
-            # Let's assume it goes into a "Savings" bucket (0% growth for now, or inflation matched?)
-            # For this MVP, we'll just add it to the total. 
-            # Ideally, we should have a "Cash" asset in running_asset_values.
-            
-            net_annual_flow = total_pension_income + one_time_impact + (recurring_monthly_impact * 12)
-            
-            # We simply add this to the total. 
-            # Note: This doesn't compound the net flow! 
-            # To fix this, we should treat this 'surplus' as a new contribution to a generic asset.
-            # Let's add it to the first asset? No, that's arbitrary.
-            # Let's just keep a separate "accumulated_surplus" variable.
-            pass # Logic handled below
-            
-    # Refined Loop for State Tracking
-    # -------------------------------
-    # Let's restart the loop logic to be cleaner.
-    
-    results = []
-    
-    # State
-    asset_states = {} # id -> value (native currency)
+    asset_values = np.zeros(n_assets)
+    # Assets only exist from the initialization (current) year onwards; if the
+    # walk starts after it (birth year in the future) they are never tracked
+    assets_initialized = False
     accumulated_surplus = 0.0 # USD
     
-    current_recurring_monthly_impact = 0.0 # USD
+    # Recurring monthly impact of active life events, with and without inflation
+    active_monthly_fixed = 0.0
+    active_monthly_infl = 0.0
     
-    for year in range(start_year, end_year + 1):
-        current_age = year - profile.birth_year
+    # Past years have no data and stay 0, so the walk starts at the current year
+    first_walked = max(0, current_real_year - start_year)
+    for i in range(first_walked, n_years):
+        year = start_year + i
+        current_age = year - birth_year
         
-        # --- 1. Handle Past/Present/Future ---
-        if year < current_real_year:
-            # Past: Just show 0
-            results.append({"year": year, "age": current_age, "total_assets": 0.0})
-            continue
-            
+        # --- 1. Handle Present/Future ---
         if year == current_real_year:
             # Initialization Year
-            total_val_usd = 0.0
-            for asset in input_data.assets:
-                asset_states[asset.id] = asset.current_value
-                
-                val_usd = asset.current_value
-                if asset.currency == "JPY":
-                    val_usd /= input_data.exchange_rate_usd_jpy
-                total_val_usd += val_usd
-            
-            # Initialize recurring impacts that might have started in the past?
-            # The current input doesn't specify start date for recurring, only "Year".
-            # We assume Life Events in the input list are FUTURE or CURRENT events?
-            # If user enters a past event, we should probably pick up its recurring impact.
-            for event in input_data.life_events:
-                if event.year <= current_real_year:
-                    current_recurring_monthly_impact += event.impact_monthly
-            
-            # Create initial asset breakdown
-            initial_asset_breakdown = {}
-            for asset in input_data.assets:
-                val_usd = asset.current_value
-                if asset.currency == "JPY":
-                    val_usd /= input_data.exchange_rate_usd_jpy
-                initial_asset_breakdown[asset.name] = round(val_usd, 2)
-
-            results.append({
-                "year": year, 
-                "age": current_age, 
-                "total_assets": round(total_val_usd, 2),
-                "pension_incomes": {},
-                "asset_balances": initial_asset_breakdown,
-                "asset_drawdowns": {}
-            })
+            asset_values = asset_initial.copy()
+            assets_initialized = True
+            balances_usd = 0.0
+            for a in range(n_assets):
+                asset_balances[i, a] = asset_values[a] * asset_fx[a]
+                balances_usd += asset_balances[i, a]
+            total_assets[i] = balances_usd
             continue
-            
-        # --- Future Years (year > current_real_year) ---
         
-        # A. Grow Existing Assets
-        year_total_assets_usd = 0.0
-        asset_breakdown = {}
-        asset_drawdowns = {}
+        # --- Future Years (year > current_real_year) ---
+        t = i - first_walked # Row in the inflation tables
+        contributing = current_age < retirement_age
         
-        for asset in input_data.assets:
-            if asset.id in asset_states:
-                # Grow
-                asset_states[asset.id] *= (1 + asset.expected_return_rate)
-                
-                # Contribute (only if before retirement)
-                # Strictly enforce retirement age for stopping contributions
-                if current_age < profile.retirement_age:
-                    asset_states[asset.id] += asset.contribution_monthly * 12
+        # A. Grow, contribute (only before retirement), withdraw and convert
+        # each asset in a single pass so no temporaries are materialized
+        balances_usd = 0.0
+        withdrawals_usd = 0.0
+        if assets_initialized:
+            for a in range(n_assets):
+                value = asset_values[a] * (1 + asset_returns[a])
+                if contributing:
+                    value += asset_contribs[a]
+                withdrawal = 0.0
+                if current_age >= asset_withdraw_start[a]:
+                    withdrawal = value * asset_withdraw_rate[a]
+                    value -= withdrawal
+                asset_values[a] = value
                 
-                # Withdraw (if applicable)
-                withdrawal_amount_usd = 0.0
-                if asset.withdrawal_start_age is not None and current_age >= asset.withdrawal_start_age:
-                    # Calculate withdrawal in native currency
-                    withdrawal_native = asset_states[asset.id] * asset.withdrawal_rate
-                    asset_states[asset.id] -= withdrawal_native
-                    
-                    # Convert withdrawal to USD for reporting
-                    withdrawal_amount_usd = withdrawal_native
-                    if asset.currency == "JPY":
-                        withdrawal_amount_usd /= input_data.exchange_rate_usd_jpy
-                    
-                    asset_drawdowns[asset.name] = round(withdrawal_amount_usd, 2)
-                
-                # Convert to USD
-                val_usd = asset_states[asset.id]
-                if asset.currency == "JPY":
-                    val_usd /= input_data.exchange_rate_usd_jpy
-                
-                year_total_assets_usd += val_usd
-                asset_breakdown[asset.name] = round(val_usd, 2)
-        
-        # B. Calculate Pension Income for this year
-        year_pension_income_usd = 0.0
-        pension_breakdown = {}
+                asset_balances[i, a] = value * asset_fx[a]
+                asset_drawdowns[i, a] = withdrawal * asset_fx[a]
+                balances_usd += asset_balances[i, a]
+                withdrawals_usd += asset_drawdowns[i, a]
         
-        for pension in input_data.pensions:
-            if current_age >= pension.start_age:
-                monthly = pension.monthly_amount_estimated
-                # Inflation from NOW
-                years_from_now = year - current_real_year
-                
-                inflation = input_data.inflation_rate_us if pension.currency == "USD" else input_data.inflation_rate_jp
-                
-                if pension.is_inflation_adjusted:
-                    monthly *= (1 + inflation) ** years_from_now
-                
-                annual = monthly * 12
-                if pension.currency == "JPY":
-                    annual /= input_data.exchange_rate_usd_jpy
-                
-                year_pension_income_usd += annual
-                pension_breakdown[pension.name] = round(annual, 2)
-            else:
-                pension_breakdown[pension.name] = 0.0
+        # B. Pension Income for this year
+        pension_income_usd = 0.0
+        for p in range(n_pensions):
+            if current_age >= pension_start_ages[p]:
+                pension_incomes[i, p] = pension_income_table[t, p]
+                pension_income_usd += pension_incomes[i, p]
         
         # C. Life Events for this year
-        year_one_time_impact_usd = 0.0
-        for event in input_data.life_events:
-            if event.year == year:
-                year_one_time_impact_usd += event.impact_one_time
-                
-                # Handle recurring impact start
-                monthly_impact = event.impact_monthly
-                if event.is_inflation_adjusted:
-                    # Apply inflation from NOW until event start
-                    years_from_now = max(0, year - current_real_year)
-                    # Use US inflation as default for life events (or could be mixed, but simple for now)
-                    monthly_impact *= (1 + input_data.inflation_rate_us) ** years_from_now
-                
-                current_recurring_monthly_impact += monthly_impact
-
-        # Apply inflation to ALREADY ACTIVE recurring impacts?
-        # The current logic sums up impacts. If we want dynamic inflation on the total recurring impact,
-        # we need to track each active recurring event separately.
-        # For MVP, let's assume the 'current_recurring_monthly_impact' is fixed once added, 
-        # UNLESS we refactor to track active events.
-        # Refactoring to track active events is better for "inflation adjusted living cost".
-        
-        # REFACTOR: Track active recurring events
-        # We need to rebuild current_recurring_monthly_impact each year from active events to apply inflation correctly.
-        # But `current_recurring_monthly_impact` variable was accumulating. 
-        # Let's change strategy: Iterate all events, check if they are active (year <= current_year), and sum them up.
-        
-        current_recurring_monthly_impact = 0.0
-        for event in input_data.life_events:
-            if event.year <= year:
-                # Event is active
-                monthly = event.impact_monthly
-                if monthly != 0:
-                    if event.is_inflation_adjusted:
-                        years_from_now = max(0, year - current_real_year)
-                        monthly *= (1 + input_data.inflation_rate_us) ** years_from_now
-                    current_recurring_monthly_impact += monthly
+        one_time_impact = event_one_time_by_year[i]
+        active_monthly_fixed += event_monthly_fixed_by_year[i]
+        active_monthly_infl += event_monthly_infl_by_year[i]
+        recurring_monthly_impact = active_monthly_fixed + active_monthly_infl * infl_pow_us[t]
         
         # D. Net Flow (Income - Expenses)
-        # Expenses are negative impacts in life events
-        # Note: Asset withdrawals are also "Income" in terms of cash flow available for spending,
-        # but they are already deducted from assets.
-        # If we want to track "Total Income Available", we should sum pension + withdrawals.
-        # But for "Net Flow" affecting Surplus, withdrawals are just a transfer from Asset to Cash (Surplus).
+        # Withdrawals are a transfer from Asset to Cash (Surplus).
+        net_annual_flow = (
+            pension_income_usd
+            + one_time_impact
+            + recurring_monthly_impact * 12
+            + withdrawals_usd
+        )
         
-        total_withdrawals_usd = sum(asset_drawdowns.values())
-        net_annual_flow = year_pension_income_usd + year_one_time_impact_usd + (current_recurring_monthly_impact * 12) + total_withdrawals_usd
-        
-        # E. Apply Net Flow to Surplus
-        # We assume surplus grows at inflation rate (purchasing power parity) or 0? 
-        # Let's assume it's cash earning 0% real return (so just inflation adjusted? or just nominal 0?)
-        # Let's keep it simple: nominal 0 growth for surplus cash.
+        # E. Apply Net Flow to Surplus (nominal 0 growth for surplus cash)
         accumulated_surplus += net_annual_flow
         
-        # Final Total
-        total = year_total_assets_usd + accumulated_surplus
-        results.append({
-            "year": year,
-            "age": current_age,
-            "total_assets": round(total, 2),
-            "pension_incomes": pension_breakdown,
-            "asset_balances": asset_breakdown,
-            "asset_drawdowns": asset_drawdowns
-        })
+        total_assets[i] = balances_usd + accumulated_surplus
+    
+    return total_assets, asset_balances, asset_drawdowns, pension_incomes
+
 
-    return results
+@njit(parallel=True, cache=True, nogil=True)
+def _simulate_batch(
+    asset_initial,
+    asset_returns,
+    asset_contribs,
+    asset_withdraw_start,
+    asset_withdraw_rate,
+    asset_fx,
+    pension_start_ages,
+    pension_income_table,
+    event_one_time_by_year,
+    event_monthly_fixed_by_year,
+    event_monthly_infl_by_year,
+    infl_pow_us,
+    birth_year,
+    retirement_age,
+    current_real_year,
+    start_year,
+    end_year,
+):
+    """
+    Run _simulate_core once per return scenario, spread across cores.
+    
+    Args:
+        asset_returns: Annual return rate per (scenario, asset)
+        (all other arguments as in _simulate_core)
+    
+    Returns:
+        Tuple of (total_assets, asset_balances) with shapes (n_scenarios, n_years)
+        and (n_scenarios, n_years, n_assets), in USD and unrounded
+    """
+    n_scenarios = asset_returns.shape[0]
+    n_years = end_year - start_year + 1
+    total_assets = np.empty((n_scenarios, n_years))
+    asset_balances = np.empty((n_scenarios, n_years, asset_initial.shape[0]))
+    
+    # Scenarios are independent, so each one is a full sequential year walk
+    for s in prange(n_scenarios):
+        result = _simulate_core(
+            asset_initial,
+            asset_returns[s],
+            asset_contribs,
+            asset_withdraw_start,
+            asset_withdraw_rate,
+            asset_fx,
+            pension_start_ages,
+            pension_income_table,
+            event_one_time_by_year,
+            event_monthly_fixed_by_year,
+            event_monthly_infl_by_year,
+            infl_pow_us,
+            birth_year,
+            retirement_age,
+            current_real_year,
+            start_year,
+            end_year,
+        )
+        total_assets[s] = result[0]
+        asset_balances[s] = result[1]
+    
+    return total_assets, asset_balances
+
+
+from datetime import datetime
+
+def _prepare_kernel_inputs(input_data: SimulationInput, current_real_year: int) -> KernelInputs:
+    """
+    Flatten the simulation input into the arrays and scalars the kernels take.
+    
+    Args:
+        input_data: SimulationInput containing profile, assets, pensions, and life events
+        current_real_year: Calendar year the projection starts from
+    
+    Returns:
+        KernelInputs, in _simulate_core argument order
+    """
+    # Bind model fields to locals once instead of going through the Pydantic
+    # attribute lookup on every use
+    profile = input_data.profile
+    assets = input_data.assets
+    pensions = input_data.pensions
+    life_events = input_data.life_events
+    birth_year = profile.birth_year
+    retirement_age = profile.retirement_age
+    
+    # Calculate simulation range
+    start_year = birth_year
+    end_year = start_year + profile.life_expectancy
+    # Multiplier converting JPY amounts to USD; every conversion below is a
+    # multiply by a per-item factor (fx_mul for JPY, 1.0 for USD)
+    fx_mul = 1.0 / input_data.exchange_rate_usd_jpy
+    
+    # Assets (native currency)
+    asset_initial = np.array([asset.current_value for asset in assets], dtype=np.float64)
+    asset_returns = np.array([asset.expected_return_rate for asset in assets], dtype=np.float64)
+    asset_contribs = np.array([asset.contribution_monthly * 12 for asset in assets], dtype=np.float64)
+    asset_withdraw_start = np.array(
+        [NEVER_WITHDRAW_AGE if asset.withdrawal_start_age is None else asset.withdrawal_start_age for asset in assets],
+        dtype=np.int64
+    )
+    asset_withdraw_rate = np.array([asset.withdrawal_rate for asset in assets], dtype=np.float64)
+    asset_jpy = np.array([asset.currency == "JPY" for asset in assets], dtype=bool)
+    asset_fx = np.where(asset_jpy, fx_mul, 1.0)
+    
+    # Inflation factors shared by pensions and life events: rows are
+    # INFLATION_US / INFLATION_JP, columns are the walked years (from the
+    # current year or the birth year, whichever is later, to end_year), so the
+    # table never outgrows the simulated horizon
+    n_years = end_year - start_year + 1
+    first_walked_year = max(start_year, current_real_year)
+    infl_pow = _power_table(
+        np.array([input_data.inflation_rate_us, input_data.inflation_rate_jp]),
+        max(1, min(n_years, end_year - current_real_year + 1)),
+        first=first_walked_year - current_real_year
+    )
+    
+    # Pensions: precompute the USD income of every pension for every year from
+    # now as an outer product of base amounts and inflation factors, so each
+    # year only needs a row lookup and an "already receiving" mask.
+    pension_start_ages = np.array([pension.start_age for pension in pensions], dtype=np.int64)
+    pension_jpy = np.array([pension.currency == "JPY" for pension in pensions], dtype=bool)
+    pension_infl_adj = np.array([pension.is_inflation_adjusted for pension in pensions], dtype=bool)
+    pension_fx = np.where(pension_jpy, fx_mul, 1.0)
+    pension_annual_usd = np.array(
+        [pension.monthly_amount_estimated * 12 for pension in pensions], dtype=np.float64
+    ) * pension_fx
+    # Rows: walked years, columns: pensions
+    pension_infl_rows = np.where(pension_jpy, INFLATION_JP, INFLATION_US)
+    pension_infl_factor = np.where(pension_infl_adj, infl_pow[pension_infl_rows].T, 1.0)
+    pension_income_table = np.ascontiguousarray(pension_infl_factor * pension_annual_usd)
+    
+    # Life events
+    event_years = np.array([event.year for event in life_events], dtype=np.int64)
+    event_one_time = np.array([event.impact_one_time for event in life_events], dtype=np.float64)
+    event_monthly = np.array([event.impact_monthly for event in life_events], dtype=np.float64)
+    event_infl_adj = np.array([event.is_inflation_adjusted for event in life_events], dtype=bool)
+    # Index events by the year they take effect instead of scanning them all
+    # every year. Recurring impacts of events up to the current year start with
+    # the first projected year; their one-time impacts are not replayed.
+    first_projected_year = max(start_year, current_real_year + 1)
+    event_idx = np.maximum(event_years, first_projected_year) - start_year
+    in_range = event_idx < n_years
+    one_time = in_range & (event_years >= first_projected_year)
+    fixed = in_range & ~event_infl_adj
+    infl = in_range & event_infl_adj
+    event_one_time_by_year = np.zeros(n_years)
+    event_monthly_fixed_by_year = np.zeros(n_years)
+    event_monthly_infl_by_year = np.zeros(n_years)
+    np.add.at(event_one_time_by_year, event_idx[one_time], event_one_time[one_time])
+    np.add.at(event_monthly_fixed_by_year, event_idx[fixed], event_monthly[fixed])
+    np.add.at(event_monthly_infl_by_year, event_idx[infl], event_monthly[infl])
+    
+    return KernelInputs(
+        asset_initial=asset_initial,
+        asset_returns=asset_returns,
+        asset_contribs=asset_contribs,
+        asset_withdraw_start=asset_withdraw_start,
+        asset_withdraw_rate=asset_withdraw_rate,
+        asset_fx=asset_fx,
+        pension_start_ages=pension_start_ages,
+        pension_income_table=pension_income_table,
+        event_one_time_by_year=event_one_time_by_year,
+        event_monthly_fixed_by_year=event_monthly_fixed_by_year,
+        event_monthly_infl_by_year=event_monthly_infl_by_year,
+        infl_pow_us=infl_pow[INFLATION_US],
+        birth_year=birth_year,
+        retirement_age=retirement_age,
+        current_real_year=current_real_year,
+        start_year=start_year,
+        end_year=end_year,
+    )
+
+
+def run_simulation(input_data: SimulationInput) -> dict:
+    """
+    Run the financial simulation based on input data.
+    
+    Args:
+        input_data: SimulationInput containing profile, assets, pensions, and life events
+    
+    Returns:
+        Columnar simulation results: per-year series (years, ages, total_assets)
+        plus pension_incomes/asset_balances/asset_drawdowns as year x item
+        matrices whose columns follow pension_names/asset_names. All amounts
+        are in USD, rounded to cents; years before the current year are
+        reported as 0. Series are NumPy arrays (serialize with
+        orjson.OPT_SERIALIZE_NUMPY).
+    """
+    inputs = _prepare_kernel_inputs(input_data, datetime.now().year)
+    total_assets, asset_balances, asset_drawdowns, pension_incomes = _simulate_core(*inputs)
+    
+    # Columnar output: one entry per year in every series, and one column per
+    # pension/asset in the 2-D series (rows: years). Rounding happens once per
+    # array, in place, and the arrays are returned as-is for orjson to
+    # serialize without a Python list conversion.
+    years = np.arange(inputs.start_year, inputs.end_year + 1)
+    return {
+        "years": years,
+        "ages": years - inputs.birth_year,
+        "total_assets": np.round(total_assets, 2, out=total_assets),
+        "pension_names": [pension.name for pension in input_data.pensions],
+        "pension_incomes": np.round(pension_incomes, 2, out=pension_incomes),
+        "asset_names": [asset.name for asset in input_data.assets],
+        "asset_balances": np.round(asset_balances, 2, out=asset_balances),
+        "asset_drawdowns": np.round(asset_drawdowns, 2, out=asset_drawdowns),
+    }
+
+
+def run_scenario_batch(batch_input: ScenarioBatchInput) -> dict:
+    """
+    Run the simulation under many randomly perturbed return assumptions.
+    
+    Each scenario shifts every asset's expected_return_rate by a normal draw
+    with standard deviation return_volatility and keeps it for the whole run.
+    
+    Args:
+        batch_input: ScenarioBatchInput with the base simulation, scenario count,
+            return volatility and optional seed
+    
+    Returns:
+        Columnar percentile bands: years, ages, percentiles, plus total_assets
+        (percentile x year) and asset_balances (percentile x year x asset, columns
+        following asset_names). All amounts are in USD, rounded to cents. Series
+        are NumPy arrays (serialize with orjson.OPT_SERIALIZE_NUMPY).
+    """
+    inputs = _prepare_kernel_inputs(batch_input.simulation, datetime.now().year)
+    
+    rng = np.random.default_rng(batch_input.seed)
+    scenario_returns = inputs.asset_returns + rng.normal(
+        0.0, batch_input.return_volatility, (batch_input.n_scenarios, len(inputs.asset_returns))
+    )
+    total_assets, asset_balances = _simulate_batch(*inputs._replace(asset_returns=scenario_returns))
+    
+    percentiles = np.array(SCENARIO_PERCENTILES)
+    years = np.arange(inputs.start_year, inputs.end_year + 1)
+    return {
+        "years": years,
+        "ages": years - inputs.birth_year,
+        "percentiles": percentiles,
+        "total_assets": np.round(np.percentile(total_assets, percentiles, axis=0), 2),
+        "asset_names": [asset.name for asset in batch_input.simulation.assets],
+        "asset_balances": np.round(np.percentile(asset_balances, percentiles, axis=0), 2),
+    }
@@ -0,0 +1,217 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+from pydantic import ValidationError
+
+from models import MAX_SCENARIO_CELLS, MAX_YEAR, MIN_YEAR, ScenarioBatchInput, SimulationInput
+from simulation import _prepare_kernel_inputs, run_scenario_batch, run_simulation
+
+
+def reference_simulation(input_data: SimulationInput) -> list:
+    """
+    Straightforward per-year, per-item loop the vectorized simulation must match.
+
+    Returns:
+        List of per-year dicts (year, age, total_assets, pension_incomes,
+        asset_balances, asset_drawdowns), unrounded
+    """
+    profile = input_data.profile
+    fx = input_data.exchange_rate_usd_jpy
+    start_year = profile.birth_year
+    end_year = start_year + profile.life_expectancy
+    current_real_year = datetime.now().year
+
+    results = []
+    asset_states = {}
+    accumulated_surplus = 0.0
+
+    for year in range(start_year, end_year + 1):
+        current_age = year - profile.birth_year
+        row = {"year": year, "age": current_age, "total_assets": 0.0,
+               "pension_incomes": {}, "asset_balances": {}, "asset_drawdowns": {}}
+        results.append(row)
+        if year < current_real_year:
+            continue
+
+        if year == current_real_year:
+            for asset in input_data.assets:
+                asset_states[asset.id] = asset.current_value
+                val_usd = asset.current_value / fx if asset.currency == "JPY" else asset.current_value
+                row["asset_balances"][asset.name] = val_usd
+                row["total_assets"] += val_usd
+            continue
+
+        years_from_now = year - current_real_year
+        year_total_assets_usd = 0.0
+        total_withdrawals_usd = 0.0
+        for asset in input_data.assets:
+            if asset.id not in asset_states:
+                continue
+            asset_states[asset.id] *= 1 + asset.expected_return_rate
+            if current_age < profile.retirement_age:
+                asset_states[asset.id] += asset.contribution_monthly * 12
+            if asset.withdrawal_start_age is not None and current_age >= asset.withdrawal_start_age:
+                withdrawal = asset_states[asset.id] * asset.withdrawal_rate
+                asset_states[asset.id] -= withdrawal
+                withdrawal_usd = withdrawal / fx if asset.currency == "JPY" else withdrawal
+                row["asset_drawdowns"][asset.name] = withdrawal_usd
+                total_withdrawals_usd += withdrawal_usd
+            val_usd = asset_states[asset.id] / fx if asset.currency == "JPY" else asset_states[asset.id]
+            row["asset_balances"][asset.name] = val_usd
+            year_total_assets_usd += val_usd
+
+        year_pension_income_usd = 0.0
+        for pension in input_data.pensions:
+            annual = 0.0
+            if current_age >= pension.start_age:
+                annual = pension.monthly_amount_estimated * 12
+                inflation = input_data.inflation_rate_us if pension.currency == "USD" else input_data.inflation_rate_jp
+                if pension.is_inflation_adjusted:
+                    annual *= (1 + inflation) ** years_from_now
+                if pension.currency == "JPY":
+                    annual /= fx
+            row["pension_incomes"][pension.name] = annual
+            year_pension_income_usd += annual
+
+        one_time_impact = 0.0
+        recurring_monthly_impact = 0.0
+        for event in input_data.life_events:
+            if event.year == year:
+                one_time_impact += event.impact_one_time
+            if event.year <= year:
+                monthly = event.impact_monthly
+                if event.is_inflation_adjusted:
+                    monthly *= (1 + input_data.inflation_rate_us) ** years_from_now
+                recurring_monthly_impact += monthly
+
+        accumulated_surplus += (
+            year_pension_income_usd + one_time_impact + recurring_monthly_impact * 12 + total_withdrawals_usd
+        )
+        row["total_assets"] = year_total_assets_usd + accumulated_surplus
+
+    return results
+
+
+def make_input(birth_year: int) -> SimulationInput:
+    this_year = datetime.now().year
+    return SimulationInput(
+        profile={"birth_year": birth_year, "retirement_age": 65, "life_expectancy": 95},
+        assets=[
+            {"id": "a1", "name": "401k", "type": "401k", "current_value": 250000,
+             "contribution_monthly": 1500, "expected_return_rate": 0.06,
+             "withdrawal_start_age": 66, "withdrawal_rate": 0.04},
+            {"id": "a2", "name": "NISA", "type": "Brokerage", "current_value": 8000000, "currency": "JPY",
+             "contribution_monthly": 30000, "expected_return_rate": 0.04,
+             "withdrawal_start_age": 70, "withdrawal_rate": 0.03},
+            {"id": "a3", "name": "Cash", "type": "Cash", "current_value": 5000,
+             "contribution_monthly": 100, "expected_return_rate": 0.01},
+        ],
+        pensions=[
+            {"id": "p1", "name": "Social Security", "type": "SocialSecurity", "start_age": 67,
+             "monthly_amount_estimated": 2500},
+            {"id": "p2", "name": "Nenkin", "type": "JPPension", "start_age": 65,
+             "monthly_amount_estimated": 80000, "currency": "JPY", "is_inflation_adjusted": False},
+        ],
+        life_events=[
+            {"id": "e1", "name": "Mortgage", "type": "Other", "year": this_year - 3, "impact_monthly": -2000},
+            {"id": "e2", "name": "Inheritance", "type": "Other", "year": this_year, "impact_one_time": 50000},
+            {"id": "e3", "name": "Tuition", "type": "EducationEnd", "year": this_year + 4,
+             "impact_one_time": -80000, "impact_monthly": 1000, "is_inflation_adjusted": True},
+            {"id": "e4", "name": "Living costs", "type": "Retirement", "year": this_year + 20,
+             "impact_monthly": -3000, "is_inflation_adjusted": True},
+        ],
+        exchange_rate_usd_jpy=150.0,
+    )
+
+
+@pytest.mark.parametrize("years_from_now", [-60, -40, -1, 0, 5])
+def test_run_simulation_matches_reference_loop(years_from_now):
+    input_data = make_input(datetime.now().year + years_from_now)
+    expected = reference_simulation(input_data)
+    result = run_simulation(input_data)
+
+    assert result["years"].tolist() == [row["year"] for row in expected]
+    assert result["ages"].tolist() == [row["age"] for row in expected]
+    assert result["total_assets"] == pytest.approx([row["total_assets"] for row in expected], abs=0.01)
+    for i, row in enumerate(expected):
+        balances = dict(zip(result["asset_names"], result["asset_balances"][i]))
+        drawdowns = dict(zip(result["asset_names"], result["asset_drawdowns"][i]))
+        pensions = dict(zip(result["pension_names"], result["pension_incomes"][i]))
+        for name in result["asset_names"]:
+            assert balances[name] == pytest.approx(row["asset_balances"].get(name, 0.0), abs=0.01)
+            assert drawdowns[name] == pytest.approx(row["asset_drawdowns"].get(name, 0.0), abs=0.01)
+        for name in result["pension_names"]:
+            assert pensions[name] == pytest.approx(row["pension_incomes"].get(name, 0.0), abs=0.01)
+
+
+def test_future_birth_year_ignores_assets():
+    result = run_simulation(make_input(datetime.now().year + 5))
+
+    assert not result["asset_balances"].any()
+    assert not result["asset_drawdowns"].any()
+
+
+def test_scenario_batch_percentiles():
+    batch = ScenarioBatchInput(simulation=make_input(1980), n_scenarios=50, seed=1)
+    result = run_scenario_batch(batch)
+
+    assert result["total_assets"].shape == (5, len(result["years"]))
+    assert result["asset_balances"].shape == (5, len(result["years"]), 3)
+    # Percentile bands are ordered low to high
+    assert (result["total_assets"][:-1] <= result["total_assets"][1:]).all()
+
+
+def test_scenario_batch_rejects_oversized_result():
+    simulation = make_input(1980).model_dump()
+    simulation["assets"] = [
+        {"id": f"a{i}", "name": f"Asset {i}", "type": "Brokerage", "current_value": 1000} for i in range(20)
+    ]
+    n_scenarios = MAX_SCENARIO_CELLS // (96 * 20) + 1
+
+    assert n_scenarios <= 10000
+    with pytest.raises(ValidationError):
+        ScenarioBatchInput(simulation=simulation, n_scenarios=n_scenarios)
+    ScenarioBatchInput(simulation=simulation, n_scenarios=n_scenarios - 1)
+
+
+def test_exchange_rate_must_be_positive():
+    simulation = make_input(1980).model_dump()
+    simulation["exchange_rate_usd_jpy"] = 0
+
+    with pytest.raises(ValidationError):
+        SimulationInput(**simulation)
+
+
+def test_life_expectancy_must_not_be_negative():
+    simulation = make_input(1980).model_dump()
+    simulation["profile"]["life_expectancy"] = -1
+
+    with pytest.raises(ValidationError):
+        SimulationInput(**simulation)
+
+
+@pytest.mark.parametrize("section, index, field", [
+    ("profile", None, "birth_year"),
+    ("profile", None, "retirement_age"),
+    ("assets", 0, "withdrawal_start_age"),
+    ("pensions", 0, "start_age"),
+    ("life_events", 0, "year"),
+])
+def test_ages_and_years_are_bounded(section, index, field):
+    simulation = make_input(1980).model_dump()
+    target = simulation[section] if index is None else simulation[section][index]
+    target[field] = 2**63
+
+    with pytest.raises(ValidationError):
+        SimulationInput(**simulation)
+
+
+@pytest.mark.parametrize("birth_year", [MIN_YEAR, MAX_YEAR])
+def test_inflation_tables_cover_only_the_simulated_horizon(birth_year):
+    input_data = make_input(birth_year)
+    kernel_inputs = _prepare_kernel_inputs(input_data, datetime.now().year)
+    result = run_simulation(input_data)
+
+    assert len(kernel_inputs.infl_pow_us) <= input_data.profile.life_expectancy + 1
+    assert np.isfinite(result["total_assets"]).all()
@@ -1,5 +1,5 @@
 import { useState } from "react";
-import type { Asset, Pension, LifeEvent, UserProfile, SimulationInput, SimulationResult } from "../types";
+import type { Asset, Pension, LifeEvent, UserProfile, SimulationInput, SimulationResponse, SimulationResult } from "../types";
 import { AssetForm } from "./AssetForm";
 import { PensionForm } from "./PensionForm";
 import { LifeEventForm } from "./LifeEventForm";
@@ -7,6 +7,7 @@ import { Button } from "./ui/button";
 import { Card, CardContent, CardHeader, CardTitle } from "./ui/card";
 import { LineChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer, ReferenceLine, BarChart, Bar } from 'recharts';
 import { InheritanceCalculator } from "./InheritanceCalculator";
+import { toSimulationResults } from "../lib/simulation";
 
 export function Dashboard() {
     const [assets, setAssets] = useState<Asset[]>([]);
@@ -52,8 +53,8 @@ export function Dashboard() {
                 },
                 body: JSON.stringify(input),
             });
-            const result = await response.json();
-            setSimulationResult(result);
+            const result: SimulationResponse = await response.json();
+            setSimulationResult(toSimulationResults(result));
         } catch (error) {
             console.error("Simulation failed:", error);
         }
@@ -0,0 +1,17 @@
+import type { SimulationResponse, SimulationResult } from "../types";
+
+function zipRecord(names: string[], values: number[]): Record<string, number> {
+    return Object.fromEntries(names.map((name, i) => [name, values[i]]));
+}
+
+// The backend returns columnar series; charts consume one row per year.
+export function toSimulationResults(response: SimulationResponse): SimulationResult[] {
+    return response.years.map((year, i) => ({
+        year,
+        age: response.ages[i],
+        total_assets: response.total_assets[i],
+        pension_incomes: zipRecord(response.pension_names, response.pension_incomes[i]),
+        asset_balances: zipRecord(response.asset_names, response.asset_balances[i]),
+        asset_drawdowns: zipRecord(response.asset_names, response.asset_drawdowns[i]),
+    }));
+}
@@ -55,3 +55,14 @@ export interface SimulationResult {
     asset_balances?: Record<string, number>;
     asset_drawdowns?: Record<string, number>;
 }
+
+export interface SimulationResponse {
+    years: number[];
+    ages: number[];
+    total_assets: number[];
+    pension_names: string[];
+    pension_incomes: number[][];
+    asset_names: string[];
+    asset_balances: number[][];
+    asset_drawdowns: number[][];
+}